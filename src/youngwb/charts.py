@@ -0,0 +1,267 @@
+"""
+Chart rendering module for YoungWB.
+This module renders financial statement charts for the markdown reports.
+
+Charts are drawn with the headless Agg backend in a process pool and cached on
+disk by a fingerprint of the data they plot, so unchanged charts are never redrawn.
+"""
+import glob
+import hashlib
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from youngwb.statements import find_column, year_index
+
+# Candidate statement labels of each plotted series, matched by statements.find_column
+CHART_SPECS = {
+    'revenue_margins': {
+        'title': 'Revenue and Margins',
+        'series': {
+            'Revenue': ('income_statement', ['Revenue', 'Net sales']),
+            'Gross Profit': ('income_statement', ['Gross Profit']),
+            'Net Profit': ('income_statement', ['Net Profit For the Year', 'Net profit']),
+        },
+    },
+    'lfcf_dividends': {
+        'title': 'Levered Free Cash Flow vs Dividends Paid',
+        'series': {
+            'Levered Free Cash Flow': ('cash_flow', ['Levered Free Cash Flow']),
+            'Dividends Paid': ('cash_flow', ['Dividends paid']),
+        },
+    },
+    'leverage': {
+        'title': 'Leverage',
+        'series': {
+            'Liabilities': ('balance_sheet', ['Liabilities']),
+            'Equity': ('balance_sheet', ["OWNER'S EQUITY", "Owners' Equity", 'Equity']),
+        },
+    },
+}
+
+# Rendering a handful of charts in-process is faster than starting a pool that
+# imports matplotlib once per worker
+MIN_POOL_JOBS = 12
+
+
+def extract_chart_data(statements, chart_name):
+    """
+    Extract the series plotted by a chart from a ticker's statements.
+
+    Args:
+        statements (dict): Statement DataFrames keyed by 'balance_sheet',
+            'income_statement' and 'cash_flow'
+        chart_name (str): Key into CHART_SPECS
+
+    Returns:
+        pandas.DataFrame: One column per series indexed by year, or None if
+        none of the series have any values
+    """
+    data = {}
+    for label, (statement, candidates) in CHART_SPECS[chart_name]['series'].items():
+        df = statements.get(statement)
+        if df is None or df.empty:
+            continue
+        column = find_column(df, candidates)
+        if column is None:
+            continue
+        series = pd.Series(pd.to_numeric(df[column], errors='coerce').values, index=year_index(df))
+        # An all-empty column (e.g. a company that never paid dividends) would
+        # only produce a blank chart
+        if series.notna().any():
+            data[label] = series
+
+    if not data:
+        return None
+    return pd.DataFrame(data).sort_index()
+
+
+def chart_fingerprint(ticker, chart_name, data, fmt):
+    """
+    Compute a stable fingerprint of everything that affects a rendered chart.
+
+    Args:
+        ticker (str): Stock ticker symbol
+        chart_name (str): Key into CHART_SPECS
+        data (pandas.DataFrame): Data plotted by the chart
+        fmt (str): Output format ('png' or 'svg')
+
+    Returns:
+        str: Hex digest identifying the chart
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{ticker}|{chart_name}|{fmt}|{CHART_SPECS[chart_name]['title']}".encode('utf-8'))
+    digest.update('|'.join(map(str, data.columns)).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+def _render_chart(job):
+    """Render a single chart to disk. Runs inside a pool worker process."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    ticker, chart_name, data, path = job
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    fig, ax = plt.subplots(figsize=(8, 4.5))
+    try:
+        if chart_name == 'revenue_margins' and 'Revenue' in data.columns:
+            ax.bar(data.index.astype(str), data['Revenue'], color='#9ecae1', label='Revenue')
+            ax.set_ylabel('Revenue')
+            margin_ax = ax.twinx()
+            for label in ('Gross Profit', 'Net Profit'):
+                if label in data.columns:
+                    margin = data[label] / data['Revenue'] * 100
+                    margin_ax.plot(data.index.astype(str), margin, marker='o', label=f"{label} Margin (%)")
+            margin_ax.set_ylabel('Margin (%)')
+            margin_ax.legend(loc='upper left')
+        elif chart_name == 'leverage' and {'Liabilities', 'Equity'} <= set(data.columns):
+            ratio = data['Liabilities'] / data['Equity']
+            ax.plot(data.index.astype(str), ratio, marker='o', label='Liabilities / Equity')
+            ax.set_ylabel('Ratio')
+            ax.legend(loc='upper left')
+        else:
+            plotted = data.abs() if chart_name == 'lfcf_dividends' else data.copy()
+            plotted.index = plotted.index.astype(str)
+            plotted.plot(kind='bar', ax=ax)
+            ax.legend(loc='upper left')
+
+        ax.set_title(f"{ticker} {CHART_SPECS[chart_name]['title']}")
+        ax.set_xlabel('Year')
+        fig.tight_layout()
+
+        # Write to a temporary file first so a crashed render never leaves a
+        # truncated file behind that would be mistaken for a cache hit
+        fmt = os.path.splitext(path)[1][1:]
+        fig.savefig(tmp_path, format=fmt)
+        os.replace(tmp_path, path)
+    finally:
+        plt.close(fig)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+def render_charts(datasets, output_dir="./output", fmt='png', max_workers=None):
+    """
+    Render the report charts for one or more tickers.
+
+    Args:
+        datasets (dict): Maps ticker to a dict of statement DataFrames keyed by
+            'balance_sheet', 'income_statement' and 'cash_flow'
+        output_dir (str, optional): Report directory. Charts are written to its
+            'charts' subdirectory. Defaults to "./output".
+        fmt (str, optional): 'png' or 'svg'. Defaults to 'png'.
+        max_workers (int, optional): Size of the process pool. Defaults to the
+            number of CPUs; 1 renders in the current process. The pool is only
+            used once at least MIN_POOL_JOBS charts need rendering.
+
+    Returns:
+        dict: Maps ticker to a list of (title, path) tuples for its charts
+    """
+    if fmt not in ('png', 'svg'):
+        raise ValueError(f"Unsupported chart format: {fmt}")
+
+    chart_dir = os.path.join(output_dir, 'charts')
+    os.makedirs(chart_dir, exist_ok=True)
+
+    charts = {}
+    pending = []
+    for ticker, statements in datasets.items():
+        charts[ticker] = []
+        for chart_name, spec in CHART_SPECS.items():
+            data = extract_chart_data(statements, chart_name)
+            if data is None:
+                continue
+            fingerprint = chart_fingerprint(ticker, chart_name, data, fmt)
+            path = os.path.join(chart_dir, f"{ticker}_{chart_name}_{fingerprint[:16]}.{fmt}")
+            charts[ticker].append((spec['title'], path))
+            if not os.path.exists(path):
+                pending.append((ticker, chart_name, data, path))
+
+    if not pending:
+        return charts
+
+    print(f"Rendering {len(pending)} chart(s) to {chart_dir}...")
+    if max_workers == 1 or len(pending) < MIN_POOL_JOBS:
+        for job in pending:
+            _render_chart(job)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(_render_chart, pending))
+
+    return charts
+
+
+def render_charts_safely(datasets, **kwargs):
+    """
+    Render charts like render_charts, but continue without charts on failure.
+
+    Charts are an optional part of a report, so a matplotlib or process pool
+    error should never cost the analysis itself.
+
+    Returns:
+        dict: Maps ticker to a list of (title, path) tuples, empty on failure
+    """
+    try:
+        return render_charts(datasets, **kwargs)
+    except Exception as e:
+        print(f"Chart rendering failed, continuing without charts: {e}")
+        return {ticker: [] for ticker in datasets}
+
+
+def prune_charts(output_dir="./output"):
+    """
+    Delete charts that no markdown report in output_dir links to.
+
+    Re-rendered charts get a new fingerprinted file name, so the files of older
+    data accumulate. Charts linked from any report are kept so that earlier
+    reports keep their images. Run it while no analysis is in progress, since
+    charts rendered for a report that is not yet written are not linked yet.
+
+    Args:
+        output_dir (str, optional): Report directory. Defaults to "./output".
+
+    Returns:
+        int: Number of charts deleted
+    """
+    chart_dir = os.path.join(output_dir, 'charts')
+    if not os.path.isdir(chart_dir):
+        return 0
+
+    linked = set()
+    for report in glob.glob(os.path.join(glob.escape(output_dir), '**', '*.md'), recursive=True):
+        with open(report, encoding='utf-8') as f:
+            for link in re.findall(r"!\[[^\]]*\]\(([^)]+)\)", f.read()):
+                linked.add(os.path.normpath(os.path.join(os.path.dirname(report), link)))
+
+    deleted = 0
+    for name in os.listdir(chart_dir):
+        path = os.path.normpath(os.path.join(chart_dir, name))
+        if name.endswith(('.png', '.svg')) and path not in linked:
+            os.remove(path)
+            deleted += 1
+    return deleted
+
+
+def charts_markdown(charts, markdown_dir):
+    """
+    Format rendered charts as a markdown section.
+
+    Args:
+        charts (list): (title, path) tuples as returned by render_charts
+        markdown_dir (str): Directory of the markdown file embedding the charts
+
+    Returns:
+        str: Markdown section, or an empty string if there are no charts
+    """
+    if not charts:
+        return ""
+    images = [
+        f"![{title}]({os.path.relpath(path, markdown_dir).replace(os.sep, '/')})"
+        for title, path in charts
+    ]
+    return "## Charts\n\n" + "\n\n".join(images) + "\n"
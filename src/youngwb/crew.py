@@ -5,6 +5,7 @@ from typing import List
 
 # Import the custom tools for financial analysis
 from youngwb.tools.custom_tool import FinancialDataTool
+from youngwb.llm_routing import build_route_llm
 
 # If you want to run a snippet of code before or after the crew starts,
 # you can use the @before_kickoff and @after_kickoff decorators
@@ -24,39 +25,66 @@ class Youngwb():
     # Agent definition from YAML config
         
     @agent
-    def financial_analyst(self) -> Agent:
-        """Financial analyst agent responsible for analyzing financial statements"""
+    def financial_drafter(self) -> Agent:
+        """Research associate agent that gathers data and drafts the analysis sections"""
         # Create financial data tool instance
         financial_tool = FinancialDataTool()
         
-        # Create the agent with the tool directly
+        # Tool use and section drafts run on the agent's (fast) route
+        routes = self.agents_config['llm_routes'] # type: ignore[index]
+        
+        return Agent(
+            role=self.agents_config['financial_drafter']['role'], # type: ignore[index]
+            goal=self.agents_config['financial_drafter']['goal'], # type: ignore[index]
+            backstory=self.agents_config['financial_drafter']['backstory'], # type: ignore[index]
+            tools=[financial_tool],
+            llm=build_route_llm(routes, self.agents_config['financial_drafter']['route']), # type: ignore[index]
+            verbose=True
+        )
+
+    @agent
+    def financial_analyst(self) -> Agent:
+        """Financial analyst agent responsible for synthesizing the final analysis"""
+        # The final synthesis runs on the agent's (strong) route
+        routes = self.agents_config['llm_routes'] # type: ignore[index]
+        
         return Agent(
             role=self.agents_config['financial_analyst']['role'], # type: ignore[index]
             goal=self.agents_config['financial_analyst']['goal'], # type: ignore[index]
             backstory=self.agents_config['financial_analyst']['backstory'], # type: ignore[index]
-            tools=[financial_tool],
+            llm=build_route_llm(routes, self.agents_config['financial_analyst']['route']), # type: ignore[index]
             verbose=True
         )
 
-    
+    @task
+    def financial_draft_task(self) -> Task:
+        """Drafting task that gathers the figures for each analysis section"""
+        return Task(
+            config=self.tasks_config['financial_draft_task'], # type: ignore[index]
+        )
+
     @task
     def financial_analysis_task(self) -> Task:
-        """Financial analysis task for analyzing company statements"""
+        """Financial analysis task that synthesizes the drafts into the final analysis"""
+        # No output_file: every caller saves a per-ticker report, and a shared
+        # file would be overwritten by crews running in parallel
         return Task(
             config=self.tasks_config['financial_analysis_task'], # type: ignore[index]
-            output_file='financial_analysis.md'
         )
 
     @crew
     def crew(self) -> Crew:
         """Creates the Youngwb crew"""
-        # For financial analysis, we only need the financial analyst agent and task
+        # The drafter prepares the sections on the fast route, then the analyst
+        # synthesizes them on the strong route
+        financial_drafter = self.financial_drafter()
         financial_analyst = self.financial_analyst()
+        financial_draft_task = self.financial_draft_task()
         financial_analysis_task = self.financial_analysis_task()
         
         return Crew(
-            agents=[financial_analyst],
-            tasks=[financial_analysis_task],
+            agents=[financial_drafter, financial_analyst],
+            tasks=[financial_draft_task, financial_analysis_task],
             process=Process.sequential,
             verbose=True
         )
@@ -7,6 +7,10 @@ import os
 from datetime import datetime
 from crewai import Crew
 
+from youngwb.charts import render_charts_safely, charts_markdown
+from youngwb.peers import DEFAULT_DB_PATH, peer_comparison
+from youngwb.statements import key_figures
+
 def format_dataframe(df):
     """
     Format a DataFrame as a string for inclusion in prompts.
@@ -19,7 +23,7 @@ def format_dataframe(df):
     """
     return df.to_string()
 
-def analyze_financial_statements(balance_sheet_df, income_statement_df, cash_flow_df, ticker="", output_dir="./output"):
+def analyze_financial_statements(balance_sheet_df, income_statement_df, cash_flow_df, ticker="", output_dir="./output", charts=None, sector=None, peer_db=DEFAULT_DB_PATH, ensure_lease=None):
     """
     Analyze financial statements using CrewAI.
     
@@ -29,6 +33,15 @@ def analyze_financial_statements(balance_sheet_df, income_statement_df, cash_flo
         cash_flow_df (pandas.DataFrame): Cash flow statement data
         ticker (str, optional): Stock ticker symbol. Defaults to "".
         output_dir (str, optional): Directory to save output. Defaults to "./output".
+        charts (list, optional): (title, path) tuples of pre-rendered charts, e.g.
+            from a batch render_charts call. Rendered here when not provided.
+        sector (str, optional): ICB sector used for peer comparison. Looked up
+            with vnstock when not provided.
+        peer_db (str, optional): Path of the peer aggregates database. Defaults to
+            YOUNGWB_PEER_DB or "./output/peer_aggregates.db".
+        ensure_lease (callable, optional): Called right before the peer aggregates
+            and the report are written. Queue workers pass one that raises once
+            another worker may have taken over the ticker.
         
     Returns:
         str: Analysis result
@@ -51,6 +64,22 @@ def analyze_financial_statements(balance_sheet_df, income_statement_df, cash_flo
     income_statement_string = format_dataframe(income_statement_df)
     cash_flow_string = format_dataframe(cash_flow_df)
     financial_ratios_string = format_dataframe(financial_ratios)
+    key_figures_string = format_dataframe(key_figures(balance_sheet_df, income_statement_df, cash_flow_df))
+    
+    # Update the sector aggregates and compare the company with its peers
+    if ensure_lease is not None:
+        ensure_lease()
+    peer_comparison_string = peer_comparison(ticker, balance_sheet_df, income_statement_df, cash_flow_df, sector=sector, db_path=peer_db)
+    
+    # Render the report charts unless they were rendered ahead of time, before
+    # the crew runs so a chart failure can never cost a finished analysis
+    if charts is None:
+        statements = {
+            "balance_sheet": balance_sheet_df,
+            "income_statement": income_statement_df,
+            "cash_flow": cash_flow_df
+        }
+        charts = render_charts_safely({ticker: statements}, output_dir=output_dir)[ticker]
     
     # Use CrewAI YAML configuration
     from youngwb.crew import Youngwb
@@ -63,7 +92,9 @@ def analyze_financial_statements(balance_sheet_df, income_statement_df, cash_flo
         "balance_sheet": balance_sheet_string,
         "income_statement": income_statement_string,
         "cash_flow": cash_flow_string,
-        "financial_ratios": financial_ratios_string
+        "financial_ratios": financial_ratios_string,
+        "key_figures": key_figures_string,
+        "peer_comparison": peer_comparison_string
     }
     
     # Create the crew instance
@@ -78,6 +109,8 @@ def analyze_financial_statements(balance_sheet_df, income_statement_df, cash_flo
 ## Analysis
 {result}
 
+{charts_markdown(charts, output_dir)}
+
 ---
 *Generated on {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}*
 """
@@ -88,6 +121,8 @@ def analyze_financial_statements(balance_sheet_df, income_statement_df, cash_flo
         print(f"Created output directory: {output_dir}")
 
     # Save the output as a markdown file in the output directory
+    if ensure_lease is not None:
+        ensure_lease()
     output_filename = f"{output_dir}/financial_analysis_{ticker}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md"
     with open(output_filename, 'w', encoding='utf-8') as md_file:
         md_file.write(markdown_content)
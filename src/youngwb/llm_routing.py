@@ -0,0 +1,102 @@
+"""
+LLM routing module for YoungWB.
+This module builds the per-route LLMs configured under `llm_routes` in agents.yaml.
+
+Each route names a model with its own timeout and an optional fallback route that
+is tried when the call fails or times out. Setting the YOUNGWB_LLM_ROUTE
+environment variable points every route at the endpoint of a single route, e.g.
+`local` to run the crew offline against the stand-in server in youngwb.local_llm.
+Routes keep their names, timeouts and fallbacks in that case, so the routing and
+fallback behaviour can be checked from the per-call log lines.
+
+A route's model is taken from the YOUNGWB_<ROUTE>_MODEL environment variable
+(e.g. YOUNGWB_FAST_MODEL), then the route's `model` key, then MODEL, so routes
+follow the provider chosen with MODEL unless configured otherwise.
+"""
+import os
+import time
+
+from crewai import LLM
+
+ROUTE_OVERRIDE_ENV = "YOUNGWB_LLM_ROUTE"
+
+
+class RoutedLLM(LLM):
+    """LLM that reports its latency and falls back to another route on failure"""
+
+    def __init__(self, route, fallback=None, **kwargs):
+        super().__init__(**kwargs)
+        self.route = route
+        self.fallback = fallback
+
+    def call(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = super().call(*args, **kwargs)
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            if self.fallback is None:
+                print(f"LLM route '{self.route}' ({self.model}) failed after {elapsed:.2f}s: {e}")
+                raise
+            print(f"LLM route '{self.route}' ({self.model}) failed after {elapsed:.2f}s: {e}. "
+                  f"Falling back to route '{self.fallback.route}'")
+            return self.fallback.call(*args, **kwargs)
+
+        print(f"LLM route '{self.route}' ({self.model}) answered in {time.perf_counter() - start:.2f}s")
+        return result
+
+
+def route_model(routes, name):
+    """
+    Resolve the model of a route.
+
+    Args:
+        routes (dict): The `llm_routes` section of agents.yaml
+        name (str): Name of the route
+
+    Returns:
+        str: Model name
+    """
+    model = os.environ.get(f"YOUNGWB_{name.upper()}_MODEL") or routes[name].get('model') or os.environ.get('MODEL')
+    if not model:
+        raise ValueError(f"No model for LLM route '{name}'. Set MODEL or YOUNGWB_{name.upper()}_MODEL")
+    return model
+
+
+def build_route_llm(routes, name, _visited=None):
+    """
+    Build the LLM for a route together with its chain of fallbacks.
+
+    Args:
+        routes (dict): The `llm_routes` section of agents.yaml
+        name (str): Name of the route to build
+        _visited (set, optional): Routes already in the fallback chain, used to
+            stop cycles such as fast -> strong -> fast
+
+    Returns:
+        RoutedLLM: The configured LLM
+    """
+    if name not in routes:
+        raise ValueError(f"Unknown LLM route '{name}'. Available routes: {', '.join(routes)}")
+
+    visited = (_visited or set()) | {name}
+    settings = dict(routes[name])
+    fallback_name = settings.pop('fallback', None)
+
+    settings['model'] = route_model(routes, name)
+
+    override = os.environ.get(ROUTE_OVERRIDE_ENV)
+    if override:
+        if override not in routes:
+            raise ValueError(f"Unknown LLM route '{override}' in {ROUTE_OVERRIDE_ENV}")
+        # Swap in the override's endpoint and model but keep this route's timeout
+        endpoint = {key: value for key, value in routes[override].items() if key not in ('fallback', 'timeout')}
+        endpoint['model'] = route_model(routes, override)
+        settings = {key: value for key, value in settings.items() if key == 'timeout'}
+        settings.update(endpoint)
+
+    fallback = None
+    if fallback_name and fallback_name not in visited:
+        fallback = build_route_llm(routes, fallback_name, visited)
+
+    return RoutedLLM(route=name, fallback=fallback, **settings)
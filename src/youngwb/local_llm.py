@@ -0,0 +1,117 @@
+"""
+Local stand-in LLM server for YoungWB.
+This module serves a minimal OpenAI-compatible chat completions endpoint so that
+model routing, timeouts and fallbacks can be exercised offline.
+
+Every request is answered after a configurable delay with a canned final answer
+naming the requested model, which makes it easy to see which route served a call.
+In `tools` mode, an agent that has tools first gets an Action turn calling its
+first tool, so tool-use turns and their routes are exercised offline as well.
+"""
+import json
+import re
+import sys
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Handler answering POST /v1/chat/completions with a canned response"""
+
+    latency = 0.0
+    mode = 'final'
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self.send_error(404, "Only /v1/chat/completions is supported")
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        model = request.get('model', 'stand-in')
+        prompt_tokens = sum(len(str(m.get('content', '')).split()) for m in request.get('messages', []))
+
+        time.sleep(self.latency)
+
+        content = self._tool_call_turn(request.get('messages', [])) if self.mode == 'tools' else None
+        if content is None:
+            content = (
+                "Thought: I now know the final answer\n"
+                f"Final Answer: Stand-in response from local model '{model}'."
+            )
+        body = json.dumps({
+            'id': f"chatcmpl-{uuid.uuid4().hex}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop'
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': len(content.split()),
+                'total_tokens': prompt_tokens + len(content.split())
+            }
+        }).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _tool_call_turn(self, messages):
+        """Return an Action turn for the agent's first tool, or None once a tool has run."""
+        # The ReAct prompt lists the agent's tools as "only one name of [Tool A, Tool B]"
+        prompt = "\n".join(str(m.get('content', '')) for m in messages if m.get('role') != 'assistant')
+        tools = re.search(r"only one name of \[([^\]]+)\]", prompt)
+        if tools is None:
+            return None
+
+        # Tool results come back appended to the agent's own turns
+        if any('Observation:' in str(m.get('content', '')) for m in messages if m.get('role') == 'assistant'):
+            return None
+
+        tool_name = tools.group(1).split(',')[0].strip()
+        return (
+            "Thought: I should gather the relevant data first\n"
+            f"Action: {tool_name}\n"
+            'Action Input: {"query": "comprehensive analysis"}'
+        )
+
+    def log_message(self, format, *args):
+        print(f"[local_llm] {self.address_string()} {format % args}")
+
+
+def serve():
+    """
+    Run the local stand-in LLM server.
+
+    The mode is 'final' (always answer) or 'tools' (call a tool first when the
+    agent has tools).
+
+    Usage: youngwb_local_llm [port] [latency_seconds] [mode]
+    Example: youngwb_local_llm 8000 0.5 tools
+    """
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    StandInHandler.latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    StandInHandler.mode = sys.argv[3] if len(sys.argv) > 3 else 'final'
+    if StandInHandler.mode not in ('final', 'tools'):
+        raise ValueError("Mode must be 'final' or 'tools'")
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), StandInHandler)
+    print(f"Local stand-in LLM listening on http://127.0.0.1:{port}/v1 "
+          f"(latency {StandInHandler.latency:.2f}s, mode {StandInHandler.mode})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    serve()
@@ -2,13 +2,20 @@
 import sys
 import warnings
 import os
+import multiprocessing
 import pandas as pd
 
+from functools import partial
+
 from datetime import datetime
-from vnstock import Vnstock
+from vnstock import Listing, Vnstock
 
+from youngwb.charts import charts_markdown, prune_charts, render_charts_safely
 from youngwb.crew import Youngwb
-from youngwb.financial_analysis import format_dataframe
+from youngwb.financial_analysis import analyze_financial_statements, format_dataframe
+from youngwb.peers import DEFAULT_DB_PATH, get_icb_sector, list_sectors, peer_comparison, refresh_sector
+from youngwb.statements import key_figures
+from youngwb.work_queue import DEFAULT_QUEUE_PATH, TickerQueue, run_worker
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
@@ -75,21 +82,32 @@ def run():
             'balance_sheet': format_dataframe(balance_sheet),
             'income_statement': format_dataframe(income_statement),
             'cash_flow': format_dataframe(cash_flow),
-            'financial_ratios': format_dataframe(financial_ratios)
+            'financial_ratios': format_dataframe(financial_ratios),
+            'key_figures': format_dataframe(key_figures(balance_sheet, income_statement, cash_flow)),
+            'peer_comparison': peer_comparison(ticker, balance_sheet, income_statement, cash_flow)
         }
         
-        # Run the crew
-        result = Youngwb().crew().kickoff(inputs=inputs)
-        
         # Create output directory if it doesn't exist
         output_dir = "./output"
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
         
+        # Render the report charts before the crew runs, so a chart failure
+        # can never cost a finished analysis
+        statements = {
+            'balance_sheet': balance_sheet,
+            'income_statement': income_statement,
+            'cash_flow': cash_flow
+        }
+        charts = render_charts_safely({ticker: statements}, output_dir=output_dir)[ticker]
+        
+        # Run the crew
+        result = Youngwb().crew().kickoff(inputs=inputs)
+        
         # Save the analysis to a file
         output_file = f"{output_dir}/financial_analysis_{ticker}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md"
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(f"# {ticker} Financial Analysis\n\n{result}\n\n---\n*Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*")
+            f.write(f"# {ticker} Financial Analysis\n\n{result}\n\n{charts_markdown(charts, output_dir)}\n---\n*Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*")
         
         print(f"\nAnalysis saved to {output_file}")
         return result
@@ -98,6 +116,184 @@ def run():
         raise Exception(f"An error occurred while running financial analysis: {e}")
 
 
+def batch():
+    """
+    Run the financial analysis crew for several tickers.
+    
+    The charts for every ticker are rendered up front in a single process
+    pool, then each ticker is analyzed in turn.
+    
+    Usage: youngwb_batch [ticker_symbol ...]
+    Example: youngwb_batch REE FPT VNM
+    """
+    tickers = sys.argv[1:] or ['REE']
+    output_dir = "./output"
+    
+    try:
+        # Retrieve financial data for every ticker
+        datasets = {}
+        for ticker in tickers:
+            balance_sheet, income_statement, cash_flow = retrieve_financial_data(ticker)
+            datasets[ticker] = {
+                'balance_sheet': balance_sheet,
+                'income_statement': income_statement,
+                'cash_flow': cash_flow
+            }
+        
+        # Render all charts in one pass so they are drawn in parallel
+        charts = render_charts_safely(datasets, output_dir=output_dir)
+        
+        results = {}
+        for ticker, statements in datasets.items():
+            results[ticker] = analyze_financial_statements(
+                balance_sheet_df=statements['balance_sheet'],
+                income_statement_df=statements['income_statement'],
+                cash_flow_df=statements['cash_flow'],
+                ticker=ticker,
+                output_dir=output_dir,
+                charts=charts[ticker]
+            )
+        
+        return results
+        
+    except Exception as e:
+        raise Exception(f"An error occurred while running batch financial analysis: {e}")
+
+
+def clean_charts():
+    """
+    Delete rendered charts that no report in the output directory links to.
+    
+    Usage: youngwb_prune_charts [output_dir]
+    Example: youngwb_prune_charts ./output
+    """
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else os.environ.get('YOUNGWB_OUTPUT_DIR', "./output")
+    
+    try:
+        deleted = prune_charts(output_dir)
+        print(f"Deleted {deleted} unreferenced chart(s) from {output_dir}")
+        
+    except Exception as e:
+        raise Exception(f"An error occurred while pruning charts: {e}")
+
+
+def analyze_ticker(ticker, ensure_lease=None, output_dir="./output", peer_db=DEFAULT_DB_PATH):
+    """
+    Retrieve a ticker's statements and run the financial analysis crew on them.
+    
+    Args:
+        ticker (str): Stock ticker symbol
+        ensure_lease (callable, optional): Lease check of a queue worker, called
+            before any result is persisted.
+        output_dir (str, optional): Directory to save output. Defaults to "./output".
+        peer_db (str, optional): Path of the peer aggregates database. Defaults to
+            YOUNGWB_PEER_DB or "./output/peer_aggregates.db".
+    
+    Returns:
+        str: Analysis result
+    """
+    balance_sheet, income_statement, cash_flow = retrieve_financial_data(ticker)
+    statements = {
+        'balance_sheet': balance_sheet,
+        'income_statement': income_statement,
+        'cash_flow': cash_flow
+    }
+    
+    # Workers already run in parallel, so each renders its charts in-process
+    charts = render_charts_safely({ticker: statements}, output_dir=output_dir, max_workers=1)[ticker]
+    
+    return analyze_financial_statements(
+        balance_sheet_df=balance_sheet,
+        income_statement_df=income_statement,
+        cash_flow_df=cash_flow,
+        ticker=ticker,
+        output_dir=output_dir,
+        charts=charts,
+        peer_db=peer_db,
+        ensure_lease=ensure_lease
+    )
+
+
+def enqueue():
+    """
+    Queue tickers for a distributed run, resetting any finished in a previous run.
+    
+    The queue lives at YOUNGWB_QUEUE_DB (default ./output/work_queue.db).
+    Without tickers, every listed symbol is queued.
+    
+    Usage: youngwb_enqueue [ticker_symbol ...]
+    Example: youngwb_enqueue REE FPT VNM
+    """
+    db_path = os.environ.get('YOUNGWB_QUEUE_DB', DEFAULT_QUEUE_PATH)
+    tickers = sys.argv[1:] or Listing().all_symbols()['symbol'].tolist()
+    
+    try:
+        queue = TickerQueue(db_path)
+        queued = queue.enqueue(tickers, requeue=True)
+        print(f"Queued {queued} of {len(tickers)} tickers in {db_path}: {queue.counts()}")
+        
+    except Exception as e:
+        raise Exception(f"An error occurred while queueing tickers: {e}")
+
+
+def worker():
+    """
+    Start worker processes that analyze queued tickers until the queue is drained.
+    
+    Run this on every machine taking part. YOUNGWB_QUEUE_DB, YOUNGWB_PEER_DB and
+    YOUNGWB_OUTPUT_DIR must point at the same paths on shared disk on every
+    machine, so all workers share one queue, one set of sector aggregates and
+    one report directory.
+    
+    Usage: youngwb_worker [n_processes]
+    Example: youngwb_worker 4
+    """
+    db_path = os.environ.get('YOUNGWB_QUEUE_DB', DEFAULT_QUEUE_PATH)
+    output_dir = os.environ.get('YOUNGWB_OUTPUT_DIR', "./output")
+    n_processes = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    
+    try:
+        handler = partial(analyze_ticker, output_dir=output_dir, peer_db=DEFAULT_DB_PATH)
+        processes = [
+            multiprocessing.Process(target=run_worker, args=(handler, db_path))
+            for _ in range(n_processes)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        
+        print(f"Workers finished: {TickerQueue(db_path).counts()}")
+        
+    except Exception as e:
+        raise Exception(f"An error occurred while running workers: {e}")
+
+
+def refresh_peers():
+    """
+    Fill the sector peer aggregates from the statements of every listed symbol
+    in the given tickers' sectors, without running the crew.
+    
+    Without tickers, every sector is refreshed.
+    
+    Usage: youngwb_refresh_peers [ticker_symbol ...]
+    Example: youngwb_refresh_peers REE
+    """
+    try:
+        if len(sys.argv) > 1:
+            sectors = {get_icb_sector(ticker) for ticker in sys.argv[1:]} - {None}
+        else:
+            sectors = list_sectors()
+        
+        for sector in sectors:
+            print(f"Refreshing peer ratios for {sector}...")
+            refreshed = refresh_sector(sector, retrieve_financial_data)
+            print(f"Stored ratios for {refreshed} {sector} companies")
+        
+    except Exception as e:
+        raise Exception(f"An error occurred while refreshing peer aggregates: {e}")
+
+
 def train():
     """
     Train the financial analysis crew for a given number of iterations.
@@ -129,7 +325,10 @@ def train():
             'balance_sheet': format_dataframe(balance_sheet),
             'income_statement': format_dataframe(income_statement),
             'cash_flow': format_dataframe(cash_flow),
-            'financial_ratios': format_dataframe(financial_ratios)
+            'financial_ratios': format_dataframe(financial_ratios),
+            'key_figures': format_dataframe(key_figures(balance_sheet, income_statement, cash_flow)),
+            # Training must not change the production peer aggregates
+            'peer_comparison': peer_comparison(ticker, balance_sheet, income_statement, cash_flow, update=False)
         }
         
         # Run training
@@ -187,7 +386,10 @@ def test():
             'balance_sheet': format_dataframe(balance_sheet),
             'income_statement': format_dataframe(income_statement),
             'cash_flow': format_dataframe(cash_flow),
-            'financial_ratios': format_dataframe(financial_ratios)
+            'financial_ratios': format_dataframe(financial_ratios),
+            'key_figures': format_dataframe(key_figures(balance_sheet, income_statement, cash_flow)),
+            # Evaluation must not change the production peer aggregates
+            'peer_comparison': peer_comparison(ticker, balance_sheet, income_statement, cash_flow, update=False)
         }
         
         # Run test with the evaluation LLM
@@ -0,0 +1,369 @@
+"""
+Peer comparison module for YoungWB.
+This module maintains precomputed ICB sector aggregates of financial ratios.
+
+Ticker ratios are stored in a SQLite database together with the median and
+quartiles of each ratio per sector and year. The statement universe is filled
+without running the crew by refresh_sector (the youngwb_refresh_peers command),
+and analyzed tickers are added as they refresh. Refreshing a ticker only
+recomputes the sector/year groups it belongs to, and the crew receives a compact
+percentile table instead of raw peer statements.
+"""
+import os
+import sqlite3
+from contextlib import contextmanager
+from functools import lru_cache
+
+import pandas as pd
+
+from youngwb.statements import find_column, year_index
+
+# Multi-node runs must point every machine at the same database on shared disk
+DEFAULT_DB_PATH = os.environ.get('YOUNGWB_PEER_DB', "./output/peer_aggregates.db")
+
+# Sector statistics over fewer companies than this are not meaningful
+MIN_PEERS = 5
+
+# Statement line items used by the ratios, matched by statements.find_column
+LINE_ITEMS = {
+    'revenue': ('income_statement', ['Revenue', 'Net sales']),
+    'gross_profit': ('income_statement', ['Gross Profit']),
+    'net_profit': ('income_statement', ['Net Profit For the Year', 'Net profit']),
+    'current_assets': ('balance_sheet', ['CURRENT ASSETS']),
+    'total_assets': ('balance_sheet', ['TOTAL ASSETS']),
+    'current_liabilities': ('balance_sheet', ['Current liabilities']),
+    'liabilities': ('balance_sheet', ['LIABILITIES']),
+    'equity': ('balance_sheet', ["OWNER'S EQUITY", "Owners' Equity"]),
+    'levered_fcf': ('cash_flow', ['Levered Free Cash Flow']),
+    'dividends_paid': ('cash_flow', ['Dividends paid']),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ticker_ratios (
+    ticker TEXT NOT NULL,
+    sector TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    ratio TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (ticker, year, ratio)
+);
+CREATE INDEX IF NOT EXISTS idx_ticker_ratios_group ON ticker_ratios (sector, year, ratio, value);
+CREATE TABLE IF NOT EXISTS sector_aggregates (
+    sector TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    ratio TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    q1 REAL,
+    median REAL,
+    q3 REAL,
+    PRIMARY KEY (sector, year, ratio)
+);
+"""
+
+
+def compute_ratios(balance_sheet, income_statement, cash_flow):
+    """
+    Compute the yearly ratios used for peer comparison.
+
+    Args:
+        balance_sheet (pandas.DataFrame): Balance sheet data
+        income_statement (pandas.DataFrame): Income statement data
+        cash_flow (pandas.DataFrame): Cash flow statement data
+
+    Returns:
+        pandas.DataFrame: One column per ratio indexed by year
+    """
+    statements = {
+        'balance_sheet': balance_sheet,
+        'income_statement': income_statement,
+        'cash_flow': cash_flow
+    }
+
+    items = {}
+    for name, (statement, candidates) in LINE_ITEMS.items():
+        df = statements[statement]
+        if df is None or df.empty:
+            continue
+        column = find_column(df, candidates)
+        if column is not None:
+            items[name] = pd.Series(pd.to_numeric(df[column], errors='coerce').values, index=year_index(df))
+
+    def ratio(numerator, denominator, absolute=False):
+        if numerator not in items or denominator not in items:
+            return None
+        divisor = items[denominator].abs() if absolute else items[denominator]
+        return items[numerator] / divisor
+
+    ratios = {
+        'Gross Margin': ratio('gross_profit', 'revenue'),
+        'Net Margin': ratio('net_profit', 'revenue'),
+        'ROE': ratio('net_profit', 'equity'),
+        'ROA': ratio('net_profit', 'total_assets'),
+        'Current Ratio': ratio('current_assets', 'current_liabilities'),
+        'Liabilities to Equity': ratio('liabilities', 'equity'),
+        'Dividend Coverage Ratio': ratio('levered_fcf', 'dividends_paid', absolute=True),
+    }
+    ratios = {name: series for name, series in ratios.items() if series is not None}
+    if not ratios:
+        return pd.DataFrame()
+
+    # Duplicate years (e.g. restated reports) keep the last row reported
+    result = pd.DataFrame(ratios).replace([float('inf'), float('-inf')], float('nan'))
+    result = result[~result.index.duplicated(keep='last')]
+    return result.sort_index()
+
+
+@lru_cache(maxsize=1)
+def _industry_listing():
+    """Load the ICB industry classification of all listed symbols."""
+    from vnstock import Listing
+    return Listing().symbols_by_industries()
+
+
+def get_icb_sector(ticker):
+    """
+    Look up the ICB sector (level 2) of a ticker.
+
+    Args:
+        ticker (str): Stock ticker symbol
+
+    Returns:
+        str: Sector name, or None if the ticker is not classified
+    """
+    listing = _industry_listing()
+    match = listing[listing['symbol'] == ticker]
+    if match.empty or pd.isna(match['icb_name2'].iloc[0]):
+        return None
+    return match['icb_name2'].iloc[0]
+
+
+def sector_symbols(sector):
+    """
+    List the symbols classified in an ICB sector (level 2).
+
+    Args:
+        sector (str): Sector name
+
+    Returns:
+        list: Ticker symbols in the sector
+    """
+    listing = _industry_listing()
+    return listing.loc[listing['icb_name2'] == sector, 'symbol'].tolist()
+
+
+def list_sectors():
+    """Return the names of all ICB sectors (level 2) with listed symbols."""
+    return sorted(_industry_listing()['icb_name2'].dropna().unique().tolist())
+
+
+def refresh_sector(sector, retrieve, db_path=DEFAULT_DB_PATH):
+    """
+    Compute and store the ratios of every symbol in a sector without running the crew.
+
+    Args:
+        sector (str): Sector name
+        retrieve (callable): Returns (balance_sheet, income_statement, cash_flow)
+            for a ticker, e.g. main.retrieve_financial_data
+        db_path (str, optional): Path of the aggregates database. Defaults to DEFAULT_DB_PATH.
+
+    Returns:
+        int: Number of symbols whose ratios were stored
+    """
+    store = PeerAggregates(db_path)
+    refreshed = 0
+    for ticker in sector_symbols(sector):
+        try:
+            store.update_ticker(ticker, sector, compute_ratios(*retrieve(ticker)))
+            refreshed += 1
+        except Exception as e:
+            # Delisted or newly listed symbols often have no statements yet
+            print(f"Skipping {ticker}: {e}")
+    return refreshed
+
+
+class PeerAggregates():
+    """SQLite-backed store of ticker ratios and their sector aggregates"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection that commits on success and is always closed."""
+        # A generous timeout lets concurrent writers wait for each other's
+        # transactions instead of failing with "database is locked"
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def update_ticker(self, ticker, sector, ratios):
+        """
+        Replace a ticker's ratios and refresh only the aggregates they affect.
+
+        Args:
+            ticker (str): Stock ticker symbol
+            sector (str): ICB sector of the ticker
+            ratios (pandas.DataFrame): Ratios indexed by year, as returned by compute_ratios
+        """
+        rows = [
+            (ticker, sector, int(year), name, float(value))
+            for name in ratios.columns
+            for year, value in ratios[name].dropna().items()
+        ]
+
+        with self._connect() as conn:
+            # Groups the ticker used to belong to must be refreshed as well, in
+            # case its sector changed or a year dropped out of its statements
+            groups = set(conn.execute(
+                "SELECT sector, year, ratio FROM ticker_ratios WHERE ticker = ?", (ticker,)
+            ).fetchall())
+            groups.update((row[1], row[2], row[3]) for row in rows)
+
+            conn.execute("DELETE FROM ticker_ratios WHERE ticker = ?", (ticker,))
+            conn.executemany("INSERT INTO ticker_ratios VALUES (?, ?, ?, ?, ?)", rows)
+            for group in groups:
+                self._refresh_group(conn, *group)
+
+    def _refresh_group(self, conn, sector, year, ratio):
+        """Recompute the aggregate of a single sector, year and ratio."""
+        values = pd.Series([row[0] for row in conn.execute(
+            "SELECT value FROM ticker_ratios WHERE sector = ? AND year = ? AND ratio = ?",
+            (sector, year, ratio)
+        )], dtype=float)
+
+        if values.empty:
+            conn.execute(
+                "DELETE FROM sector_aggregates WHERE sector = ? AND year = ? AND ratio = ?",
+                (sector, year, ratio)
+            )
+            return
+
+        conn.execute(
+            "INSERT OR REPLACE INTO sector_aggregates VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (sector, year, ratio, len(values),
+             float(values.quantile(0.25)), float(values.median()), float(values.quantile(0.75)))
+        )
+
+    def percentile_table(self, ticker, year=None, min_peers=MIN_PEERS):
+        """
+        Compare a ticker's ratios with its sector peers.
+
+        Args:
+            ticker (str): Stock ticker symbol
+            year (int, optional): Reporting year. Defaults to the latest year in
+                which at least min_peers companies of the ticker's sector have
+                ratios, so early filers are compared on the last complete year.
+                Falls back to the ticker's latest year when no year qualifies.
+            min_peers (int, optional): Peer count required when choosing the
+                default year. Defaults to MIN_PEERS.
+
+        Returns:
+            pandas.DataFrame: One row per ratio with the ticker's value, the sector
+            quartiles, its percentile rank and the number of peers
+        """
+        with self._connect() as conn:
+            if year is None:
+                year = conn.execute(
+                    """
+                    SELECT MAX(t.year) FROM ticker_ratios t
+                    JOIN sector_aggregates a ON a.sector = t.sector AND a.year = t.year AND a.ratio = t.ratio
+                    WHERE t.ticker = ? AND a.count >= ?
+                    """,
+                    (ticker, min_peers)
+                ).fetchone()[0]
+            if year is None:
+                year = conn.execute(
+                    "SELECT MAX(year) FROM ticker_ratios WHERE ticker = ?", (ticker,)
+                ).fetchone()[0]
+                if year is None:
+                    return pd.DataFrame()
+
+            rows = conn.execute(
+                """
+                SELECT t.ratio, t.value, a.q1, a.median, a.q3, a.count,
+                       (SELECT COUNT(*) FROM ticker_ratios p
+                        WHERE p.sector = t.sector AND p.year = t.year AND p.ratio = t.ratio AND p.value < t.value),
+                       (SELECT COUNT(*) FROM ticker_ratios p
+                        WHERE p.sector = t.sector AND p.year = t.year AND p.ratio = t.ratio AND p.value = t.value)
+                FROM ticker_ratios t
+                JOIN sector_aggregates a ON a.sector = t.sector AND a.year = t.year AND a.ratio = t.ratio
+                WHERE t.ticker = ? AND t.year = ?
+                ORDER BY t.ratio
+                """,
+                (ticker, year)
+            ).fetchall()
+
+        table = pd.DataFrame([
+            {
+                'Ratio': ratio,
+                ticker: value,
+                'Sector Q1': q1,
+                'Sector Median': median,
+                'Sector Q3': q3,
+                'Percentile': round((below + 0.5 * equal) / count * 100),
+                'Peers': count
+            }
+            for ratio, value, q1, median, q3, count, below, equal in rows
+        ])
+        if not table.empty:
+            table = table.set_index('Ratio').round(3)
+            table.attrs['year'] = year
+        return table
+
+
+def peer_comparison(ticker, balance_sheet, income_statement, cash_flow, sector=None, db_path=DEFAULT_DB_PATH, update=True):
+    """
+    Update the peer aggregates with a ticker's statements and format its percentile table.
+
+    Args:
+        ticker (str): Stock ticker symbol
+        balance_sheet (pandas.DataFrame): Balance sheet data
+        income_statement (pandas.DataFrame): Income statement data
+        cash_flow (pandas.DataFrame): Cash flow statement data
+        sector (str, optional): ICB sector. Looked up with vnstock when not provided.
+        db_path (str, optional): Path of the aggregates database. Defaults to DEFAULT_DB_PATH.
+        update (bool, optional): Store the ticker's ratios before comparing. Pass
+            False to only read the stored aggregates, e.g. for training and
+            evaluation runs. Defaults to True.
+
+    Returns:
+        str: Percentile table formatted for inclusion in prompts
+    """
+    try:
+        if sector is None:
+            sector = get_icb_sector(ticker)
+        if sector is None:
+            return f"No ICB sector classification found for {ticker}; peer comparison unavailable."
+
+        store = PeerAggregates(db_path)
+        if update:
+            store.update_ticker(ticker, sector, compute_ratios(balance_sheet, income_statement, cash_flow))
+        table = store.percentile_table(ticker)
+    except Exception as e:
+        print(f"Error building peer comparison for {ticker}: {e}")
+        return "Peer comparison unavailable."
+
+    if table.empty:
+        return f"No ratios available to compare {ticker} with its {sector} peers."
+
+    year = table.attrs['year']
+    table = table[table['Peers'] >= MIN_PEERS]
+    if table.empty:
+        return (
+            f"Insufficient peers: fewer than {MIN_PEERS} {sector} companies have ratios for {year}, "
+            f"so no peer comparison is available. Do not draw conclusions about {ticker}'s relative position."
+        )
+
+    return (
+        f"Sector: {sector}, year {year}. "
+        f"Percentile is {ticker}'s rank among {sector} companies (100 = highest value).\n"
+        + table.to_string()
+    )
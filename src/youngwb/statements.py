@@ -0,0 +1,82 @@
+"""
+Statement helpers for YoungWB.
+This module locates line items and reporting years in vnstock statement DataFrames.
+"""
+import re
+
+import pandas as pd
+
+YEAR_COLUMNS = ['yearReport', 'Year', 'year']
+
+# Headline line items summarized for the synthesis task, with candidate labels
+KEY_LINE_ITEMS = {
+    'Revenue': ('income_statement', ['Revenue', 'Net sales']),
+    'Gross Profit': ('income_statement', ['Gross Profit']),
+    'Net Profit': ('income_statement', ['Net Profit For the Year', 'Net profit']),
+    'Total Assets': ('balance_sheet', ['TOTAL ASSETS']),
+    'Current Assets': ('balance_sheet', ['CURRENT ASSETS']),
+    'Current Liabilities': ('balance_sheet', ['Current liabilities']),
+    'Liabilities': ('balance_sheet', ['LIABILITIES']),
+    "Owners' Equity": ('balance_sheet', ["OWNER'S EQUITY", "Owners' Equity"]),
+    'Operating Cash Flow': ('cash_flow', ['Net cash inflows/outflows from operating activities']),
+    'Levered Free Cash Flow': ('cash_flow', ['Levered Free Cash Flow']),
+    'Dividends Paid': ('cash_flow', ['Dividends paid']),
+}
+
+
+def find_column(df, candidates):
+    """
+    Return the first column of df labelled with one of the candidates.
+
+    A label matches when it equals the candidate, ignoring case, optionally
+    followed by a parenthesized unit. Percentage units such as "(%)" are
+    rejected so that e.g. "Revenue YoY (%)" never stands in for "Revenue".
+    """
+    for candidate in candidates:
+        pattern = re.compile(rf"^{re.escape(candidate)}\s*(\(([^)%]*)\))?\s*$", re.IGNORECASE)
+        for column in df.columns:
+            if pattern.match(str(column)):
+                return column
+    return None
+
+
+def year_index(df):
+    """Return the reporting years of a statement, falling back to its index."""
+    for column in YEAR_COLUMNS:
+        if column in df.columns:
+            return df[column].values
+    return df.index.values
+
+
+def key_figures(balance_sheet, income_statement, cash_flow, years=5):
+    """
+    Summarize the headline figures of a company's statements.
+
+    Args:
+        balance_sheet (pandas.DataFrame): Balance sheet data
+        income_statement (pandas.DataFrame): Income statement data
+        cash_flow (pandas.DataFrame): Cash flow statement data
+        years (int, optional): Number of most recent years to keep. Defaults to 5.
+
+    Returns:
+        pandas.DataFrame: One row per line item and one column per year
+    """
+    statements = {
+        'balance_sheet': balance_sheet,
+        'income_statement': income_statement,
+        'cash_flow': cash_flow
+    }
+
+    figures = {}
+    for label, (statement, candidates) in KEY_LINE_ITEMS.items():
+        df = statements[statement]
+        if df is None or df.empty:
+            continue
+        column = find_column(df, candidates)
+        if column is not None:
+            series = pd.Series(pd.to_numeric(df[column], errors='coerce').values, index=year_index(df))
+            figures[label] = series[~series.index.duplicated(keep='last')]
+
+    if not figures:
+        return pd.DataFrame()
+    return pd.DataFrame(figures).sort_index().tail(years).T
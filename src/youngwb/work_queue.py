@@ -0,0 +1,330 @@
+"""
+Work queue module for YoungWB.
+This module distributes tickers across worker processes on one or more machines.
+
+The queue is a SQLite database, so placing it on shared disk is all that is
+needed to add workers on other machines. Workers claim a ticker with a lease,
+extend the lease with heartbeats while they work, and a ticker whose lease
+expires (e.g. because its worker crashed) is handed to the next worker until it
+runs out of attempts. Only the current lease holder can complete a ticker, so a
+worker that lost its lease cannot mark it done a second time.
+
+Losing a lease does not stop the handler that is still running, so handlers get
+an `ensure_lease` callable that they must call right before every side effect
+(e.g. saving a report). It renews the lease and raises LeaseLostError once
+another worker may own the ticker, so the late worker discards its result. A
+check renews the lease for its full duration, so a ticker is only processed
+twice if a worker stalls for longer than that between a check and its write.
+
+These guarantees rest entirely on SQLite's file locking. Locking always works
+for processes on one machine using a local disk. Across machines it works only
+on shared filesystems with coherent POSIX locks, such as NFSv4 mounted without
+`nolock`/`local_lock` or CephFS. It is unreliable on SMB/CIFS, NFSv3 without a
+lock manager and FUSE or sync mounts of object storage. On those, tickers can be
+processed twice or lost. The database keeps SQLite's rollback journal because
+WAL does not work across machines at all. Keep the clocks of all worker machines
+in sync since lease expiry compares wall-clock timestamps.
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+DEFAULT_QUEUE_PATH = "./output/work_queue.db"
+
+
+class LeaseLostError(Exception):
+    """Raised when a worker no longer holds the lease on the ticker it works on"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickers (
+    ticker TEXT PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tickers_status ON tickers (status, lease_expires);
+"""
+
+
+class TickerQueue():
+    """SQLite-backed queue of tickers with leases, heartbeats and retries"""
+
+    def __init__(self, db_path=DEFAULT_QUEUE_PATH, max_attempts=3):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        conn = sqlite3.connect(self.db_path, timeout=60)
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        """Run statements in a write transaction that holds the lock from the start."""
+        # Autocommit mode with an explicit BEGIN IMMEDIATE makes the read and the
+        # update of a claim atomic across processes and machines
+        conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _read(self):
+        """Open a connection for reads that never takes the write lock."""
+        conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, tickers, requeue=False):
+        """
+        Add tickers to the queue.
+
+        Args:
+            tickers (list): Stock ticker symbols
+            requeue (bool, optional): Reset tickers that are already queued, e.g.
+                for a new nightly run. Leased tickers are left to their workers.
+                Defaults to False.
+
+        Returns:
+            int: Number of tickers added or reset
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO tickers (ticker, updated_at) VALUES (?, ?)",
+                [(ticker, now) for ticker in tickers]
+            )
+            if requeue:
+                conn.executemany(
+                    """
+                    UPDATE tickers
+                    SET status = 'pending', attempts = 0, lease_owner = NULL,
+                        lease_expires = NULL, last_error = NULL, updated_at = ?
+                    WHERE ticker = ? AND status IN ('done', 'failed')
+                    """,
+                    [(now, ticker) for ticker in tickers]
+                )
+            return conn.total_changes - before
+
+    def claim(self, worker_id, lease_seconds):
+        """
+        Lease the next pending ticker, or one whose lease has expired.
+
+        Args:
+            worker_id (str): Unique identifier of the claiming worker
+            lease_seconds (float): Lease duration
+
+        Returns:
+            str: The claimed ticker, or None if nothing is claimable right now
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            # Tickers whose workers kept dying give up instead of looping forever
+            conn.execute(
+                """
+                UPDATE tickers
+                SET status = 'failed', lease_owner = NULL, lease_expires = NULL,
+                    last_error = COALESCE(last_error, 'Lease expired'), updated_at = ?
+                WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?
+                """,
+                (now, now, self.max_attempts)
+            )
+            row = conn.execute(
+                """
+                SELECT ticker FROM tickers
+                WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?)
+                ORDER BY attempts, ticker
+                LIMIT 1
+                """,
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            conn.execute(
+                """
+                UPDATE tickers
+                SET status = 'leased', attempts = attempts + 1, lease_owner = ?,
+                    lease_expires = ?, updated_at = ?
+                WHERE ticker = ?
+                """,
+                (worker_id, now + lease_seconds, now, row[0])
+            )
+            return row[0]
+
+    def heartbeat(self, ticker, worker_id, lease_seconds):
+        """
+        Extend a lease held by the worker.
+
+        Returns:
+            bool: False if the worker no longer holds the lease
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE tickers SET lease_expires = ?, updated_at = ?
+                WHERE ticker = ? AND status = 'leased' AND lease_owner = ?
+                """,
+                (now + lease_seconds, now, ticker, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, ticker, worker_id):
+        """
+        Mark a leased ticker as done.
+
+        Returns:
+            bool: False if the worker no longer holds the lease
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE tickers
+                SET status = 'done', lease_owner = NULL, lease_expires = NULL,
+                    last_error = NULL, updated_at = ?
+                WHERE ticker = ? AND status = 'leased' AND lease_owner = ?
+                """,
+                (time.time(), ticker, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, ticker, worker_id, error):
+        """
+        Release a leased ticker after an error, retrying it while attempts remain.
+
+        Returns:
+            bool: False if the worker no longer holds the lease
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE tickers
+                SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    lease_owner = NULL, lease_expires = NULL, last_error = ?, updated_at = ?
+                WHERE ticker = ? AND status = 'leased' AND lease_owner = ?
+                """,
+                (self.max_attempts, str(error), time.time(), ticker, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def counts(self):
+        """
+        Count the tickers in each status.
+
+        Returns:
+            dict: Maps status to the number of tickers
+        """
+        with self._read() as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM tickers GROUP BY status").fetchall())
+
+
+class _Heartbeat(threading.Thread):
+    """Background thread that keeps a lease alive while a ticker is processed"""
+
+    def __init__(self, queue, ticker, worker_id, lease_seconds, interval):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.ticker = ticker
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.lost = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                if not self.queue.heartbeat(self.ticker, self.worker_id, self.lease_seconds):
+                    print(f"Worker {self.worker_id} no longer holds the lease on {self.ticker}")
+                    self.lost.set()
+                    return
+            except sqlite3.Error as e:
+                # A missed heartbeat is retried on the next interval; the lease
+                # only expires if the queue stays unreachable for its duration
+                print(f"Heartbeat for {self.ticker} failed: {e}")
+
+    def ensure_lease(self):
+        """Renew the lease now, raising LeaseLostError if it is no longer held."""
+        if self.lost.is_set() or not self.queue.heartbeat(self.ticker, self.worker_id, self.lease_seconds):
+            self.lost.set()
+            raise LeaseLostError(f"Worker {self.worker_id} no longer holds the lease on {self.ticker}")
+
+
+def run_worker(handler, db_path=DEFAULT_QUEUE_PATH, lease_seconds=600, heartbeat_interval=60,
+               poll_interval=30, max_attempts=3):
+    """
+    Process tickers from the queue until none are left.
+
+    Args:
+        handler (callable): Called with each claimed ticker and an `ensure_lease`
+            callable, which the handler must call right before persisting any
+            result. Raising marks the attempt as failed.
+        db_path (str, optional): Path of the queue database. Defaults to DEFAULT_QUEUE_PATH.
+        lease_seconds (float, optional): Lease duration. Defaults to 600.
+        heartbeat_interval (float, optional): Seconds between lease extensions. Defaults to 60.
+        poll_interval (float, optional): Seconds to wait for leases held by other
+            workers to complete or expire. Defaults to 30.
+        max_attempts (int, optional): Attempts before a ticker is marked failed. Defaults to 3.
+
+    Returns:
+        dict: Maps status ('done', 'failed', 'lost') to the tickers this worker finished
+    """
+    worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    queue = TickerQueue(db_path, max_attempts=max_attempts)
+    processed = {'done': [], 'failed': [], 'lost': []}
+    print(f"Worker {worker_id} started")
+
+    while True:
+        ticker = queue.claim(worker_id, lease_seconds)
+        if ticker is None:
+            # Tickers leased by other workers may still come back if they crash
+            if queue.counts().get('leased', 0) == 0:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        print(f"Worker {worker_id} claimed {ticker}")
+        heartbeat = _Heartbeat(queue, ticker, worker_id, lease_seconds, heartbeat_interval)
+        heartbeat.start()
+        try:
+            handler(ticker, heartbeat.ensure_lease)
+        except LeaseLostError:
+            heartbeat.stopped.set()
+            status = 'lost'
+        except Exception as e:
+            heartbeat.stopped.set()
+            print(f"Worker {worker_id} failed on {ticker}: {e}")
+            status = 'failed' if queue.fail(ticker, worker_id, e) else 'lost'
+        else:
+            heartbeat.stopped.set()
+            status = 'done' if queue.complete(ticker, worker_id) else 'lost'
+        heartbeat.join()
+
+        if status == 'lost':
+            print(f"Worker {worker_id} lost the lease on {ticker}; another worker owns it now")
+        processed[status].append(ticker)
+
+    print(f"Worker {worker_id} finished: {len(processed['done'])} done, "
+          f"{len(processed['failed'])} failed, {len(processed['lost'])} lost")
+    return processed